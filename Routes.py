@@ -1,5 +1,8 @@
+import os
 import sys
-from typing import List, Dict, Tuple
+from math import perm
+from multiprocessing.pool import Pool
+from typing import Collection, List, Dict, Optional, Tuple, Union
 
 
 def main():
@@ -7,10 +10,26 @@ def main():
 
     # Whether the found paths are to be printed. For debugging.
     print_paths = '-P' in sys.argv or '-p' in sys.argv
+    # Whether to report the path counts with each road closed.
+    print_roads = '-R' in sys.argv or '-r' in sys.argv
+    # Whether to report how the paths were counted.
+    print_stats = '-S' in sys.argv or '-s' in sys.argv
+    # Whether to count the paths by meeting in the middle.
+    meet_in_the_middle = '-M' in sys.argv or '-m' in sys.argv
+    # Whether to report the number of paths of each length.
+    print_lengths = '-L' in sys.argv or '-l' in sys.argv
+    # Whether to report the number of paths through each settlement.
+    print_traffic = '-T' in sys.argv or '-t' in sys.argv
     file_path = sys.argv[1]
 
     board = get_board(file_path)
-    find_and_print_paths(board, print_paths)
+    find_and_print_paths(board, print_paths, print_stats, meet_in_the_middle)
+    if print_lengths:
+        find_and_print_length_histograms(board)
+    if print_roads:
+        find_and_print_road_criticality(board)
+    if print_traffic:
+        find_and_print_path_participation(board)
 
 
 START_PORT = 'SP'
@@ -26,6 +45,16 @@ GREY = 'G'
 # a passport was used to traverse it.
 BLACK = 'B'
 
+# Boards with at least this many settlements have their road criticality
+# computed in parallel by default.
+PARALLEL_MIN_SIZE = 16
+# The number of subtrees handed to each worker when searching in parallel.
+SUBTREES_PER_WORKER = 8
+# How many times longer checking whether one pair of half paths can be joined
+# takes than one step of summing half paths over subsets. Measured on ladder
+# boards in mode 3 as about 3us a pair against 0.17us a step, rounded down.
+SUBSET_SUM_COST_RATIO = 16
+
 
 class Settlement:
     """A class representing some kind of settlement on the board, connected by
@@ -43,6 +72,7 @@ class Settlement:
         GREY => Not visitable.
         BLACK => Not visitable and a passport was used to traverse this
         settlement.
+        PathFinder tracks its own visits and leaves this untouched.
 
     ID:
         The id of this node. Used for indexing purposes.
@@ -243,6 +273,45 @@ class Board:
             i += 1
         return setts
 
+    def get_interchangeable_classes(self) -> List[List[Settlement]]:
+        """Partitions the settlements on this board into classes of
+        interchangeable settlements, ordered by ID.
+
+        Two settlements are interchangeable if they are of the same type and
+        are adjacent to exactly the same other settlements. Swapping two such
+        settlements maps every path through the board onto another path of
+        the same kind, so path counts only need to be explored for one member
+        of each class."""
+        # Group by type and neighborhood, excluding the settlement itself.
+        # Non-adjacent twins share an open neighborhood, adjacent twins share
+        # a closed neighborhood.
+        open_groups = {}
+        closed_groups = {}
+        for sett in self.settlements:
+            neighbor_ids = frozenset(
+                adj.ID for adj in self.get_adjacent_settlements(sett))
+            open_key = (sett.s_type, neighbor_ids)
+            closed_key = (sett.s_type, neighbor_ids | {sett.ID})
+            open_groups.setdefault(open_key, []).append(sett)
+            closed_groups.setdefault(closed_key, []).append(sett)
+
+        # A settlement can't have both kinds of twin, so take whichever
+        # grouping gives it company.
+        classes = []
+        placed = [False] * self.get_size()
+        for group in list(open_groups.values()) + \
+                list(closed_groups.values()):
+            if len(group) > 1:
+                classes.append(group)
+                for sett in group:
+                    placed[sett.ID] = True
+        for sett in self.settlements:
+            if not placed[sett.ID]:
+                classes.append([sett])
+
+        classes.sort(key=lambda group: group[0].ID)
+        return classes
+
     def get_white_neighbors(self, sett: Settlement) -> List[Settlement]:
         """Returns all white, non-start neighbors of the given settlement."""
         neighbors = self.get_adjacent_settlements(sett)
@@ -355,62 +424,601 @@ def get_board(fp: str) -> Board:
     return parse_board(lines)
 
 
+CHAIN = 'chain'
+STAR = 'star'
+CHAIN_OF_STARS = 'chain of stars'
+
+# Stands in for the visit limit of settlements that can be entered any
+# number of times.
+UNLIMITED = sys.maxsize
+
+
+class TraversalRules:
+    """Specifies which settlements a growing path may enter.
+
+    A path may enter a settlement as many times as the visit limit of its
+    type allows. Once a settlement has reached its limit, a passport can be
+    used to enter it once more. The start port is never re-entered and a path
+    ends as soon as it enters the finish port.
+
+    === Public Attributes ===
+    visit_limits:
+        The number of times a path may enter a settlement of each type
+        without a passport, or None if there is no limit. Every type of
+        settlement on a board must be listed unless it is forbidden, and two
+        settlements without a limit can't be joined by a road, or a path
+        could go back and forth between them forever.
+    forbidden_types:
+        The types of settlement a path may never enter.
+    num_passports:
+        The number of passports each path may use.
+    passport_types:
+        The types of settlement a passport can be used to enter.
+    """
+    visit_limits: Dict[str, Optional[int]]
+    forbidden_types: Collection[str]
+    num_passports: int
+    passport_types: Collection[str]
+
+    def __init__(self, visit_limits: Dict[str, Optional[int]],
+                 forbidden_types: Collection[str] = (),
+                 num_passports: int = 0,
+                 passport_types: Collection[str] = ()) -> None:
+        """Initialises rules with the given attributes."""
+        if num_passports < 0:
+            raise ValueError("Number of passports cannot be negative.")
+        for limit in visit_limits.values():
+            if limit is not None and limit < 0:
+                raise ValueError("Visit limits cannot be negative.")
+        self.visit_limits = visit_limits
+        self.forbidden_types = forbidden_types
+        self.num_passports = num_passports
+        self.passport_types = passport_types
+
+    def compile(self, board: Board) \
+            -> Tuple[List[List[int]], List[int], List[bool]]:
+        """Compiles these rules into lookup tables for <board>, indexed by
+        settlement ID. Returns the IDs of the settlements that may be entered
+        from each settlement, the number of times each settlement may be
+        entered without a passport, and whether a passport can be used to
+        enter each settlement."""
+        limits = []
+        passport_ok = []
+        for sett in board.settlements:
+            limit = self.visit_limits.get(sett.s_type)
+            if sett.is_start():
+                limit = 0
+            elif sett.is_finish():
+                limit = 1
+            elif sett.s_type not in self.visit_limits and \
+                    sett.s_type not in self.forbidden_types:
+                raise ValueError("No visit limit given for settlement type "
+                                 + sett.s_type + ".")
+            elif limit is None:
+                limit = UNLIMITED
+            limits.append(limit)
+            passport_ok.append(sett.s_type in self.passport_types)
+
+        # Leave out roads that can never be taken.
+        neighbors = []
+        for sett in board.settlements:
+            neighbors.append([adj.ID for adj in
+                              board.get_adjacent_settlements(sett)
+                              if not adj.is_start() and
+                              adj.s_type not in self.forbidden_types])
+
+        # A path could go back and forth between two settlements without a
+        # limit forever.
+        for sett in board.settlements:
+            if limits[sett.ID] == UNLIMITED and \
+                    sett.s_type not in self.forbidden_types and \
+                    any(limits[adj_id] == UNLIMITED
+                        for adj_id in neighbors[sett.ID]):
+                raise ValueError("Settlements without a visit limit cannot "
+                                 "be connected by road.")
+        return neighbors, limits, passport_ok
+
+
+# The rules for each of the preset modes. Mode 1 visits every settlement at
+# most once. Mode 2 allows cities to be revisited. Mode 3 also has a passport
+# to revisit a single village.
+MODE_RULES = {
+    1: TraversalRules({VILLAGE: 1, CITY: 1}),
+    2: TraversalRules({VILLAGE: 1, CITY: None}),
+    3: TraversalRules({VILLAGE: 1, CITY: None}, num_passports=1,
+                      passport_types=(VILLAGE,))
+}
+
+# The engines a PathFinder can count paths with.
+CLOSED_FORM = 'closed form'
+SEARCH = 'search'
+MEET_IN_THE_MIDDLE = 'meet in the middle'
+
+
+class BoardShape:
+    """A recognised board shape for which the number of paths in each mode
+    has a closed form.
+
+    The board is a chain of settlements leading from the start port to the
+    finish port. Each city on the chain may also have any number of villages
+    hanging off it, which are connected to nothing else.
+
+    === Public Attributes ===
+    name:
+        CHAIN if no villages hang off the chain, STAR if the chain is a
+        single city with villages hanging off it, CHAIN_OF_STARS otherwise.
+    stars:
+        For each city on the chain, in order from the start port, the number
+        of villages hanging off it, whether the settlement before it on the
+        chain is a village, and whether the settlement after it on the chain
+        is a village.
+    """
+    name: str
+    stars: List[Tuple[int, bool, bool]]
+
+    def __init__(self, name: str, stars: List[Tuple[int, bool, bool]]) \
+            -> None:
+        """Initialises a shape called <name> with the given <stars>."""
+        self.name = name
+        self.stars = stars
+
+    def count_paths(self, mode: int) -> int:
+        """Returns the number of paths from the start port to the finish port
+        on a board of this shape using the traversal rules of <mode>."""
+        # Villages hanging off a city are dead ends unless cities can be
+        # revisited, so only the chain itself can be taken.
+        if mode == 1:
+            return 1
+
+        # Without the passport each city is left by carrying on along the
+        # chain, after some ordered tour of the villages hanging off it.
+        tours = [_count_tours(num_vil) for num_vil, _, _ in self.stars]
+        num_paths = 1
+        for num_tours in tours:
+            num_paths *= num_tours
+        if mode == 2:
+            return num_paths
+
+        # Otherwise the passport can be used at most once, around one city.
+        for i, star in enumerate(self.stars):
+            others = 1
+            for j, num_tours in enumerate(tours):
+                if j != i:
+                    others *= num_tours
+            num_paths += _count_passport_tours(*star) * others
+        return num_paths
+
+
+def _count_tours(num_vil: int) -> int:
+    """Returns the number of ways to visit some of <num_vil> villages hanging
+    off a city in turn, without the passport."""
+    return sum(perm(num_vil, i) for i in range(num_vil + 1))
+
+
+def _count_passport_tours(num_vil: int, village_before: bool,
+                          village_after: bool) -> int:
+    """Returns the number of ways to visit some of <num_vil> villages hanging
+    off a city in turn while using the passport once around that city.
+
+    After the i-th village the passport can take us back into any of the i
+    villages visited so far. At any point in the tour it can also take us
+    back into the village before the city, or, after stepping forward into
+    the village after the city and back, into that village again."""
+    num_returns = int(village_before) + int(village_after)
+    total = 0
+    for i in range(num_vil + 1):
+        total += perm(num_vil, i) * (i * (i + 1) // 2 + num_returns * (i + 1))
+    return total
+
+
+def recognize_board_shape(board: Board) -> Optional[BoardShape]:
+    """Returns the shape of <board> if it has a closed form for its number of
+    paths, or None otherwise."""
+    neighbors = [board.get_adjacent_settlements(sett)
+                 for sett in board.settlements]
+
+    # Villages connected to a single city hang off that city.
+    hanging = [sett.is_village() and len(neighbors[sett.ID]) == 1
+               and neighbors[sett.ID][0].s_type == CITY
+               for sett in board.settlements]
+
+    # Follow the chain from the start port to the finish port.
+    chain = [board.start_port]
+    prev = None
+    while not chain[-1].is_finish():
+        cur = chain[-1]
+        onward = [adj for adj in neighbors[cur.ID]
+                  if not hanging[adj.ID] and adj is not prev]
+        if len(onward) != 1:
+            return None
+        prev = cur
+        chain.append(onward[0])
+    if len(neighbors[chain[-1].ID]) != 1:
+        return None
+
+    # Every other settlement must hang off the chain.
+    if len(chain) + sum(hanging) != board.get_size():
+        return None
+
+    stars = []
+    for i in range(1, len(chain) - 1):
+        if chain[i].s_type == CITY:
+            num_vil = sum(hanging[adj.ID] for adj in neighbors[chain[i].ID])
+            stars.append((num_vil, chain[i - 1].is_village(),
+                          chain[i + 1].is_village()))
+
+    num_with_villages = len([star for star in stars if star[0] > 0])
+    if num_with_villages == 0:
+        name = CHAIN
+    elif len(chain) == 3:
+        name = STAR
+    else:
+        name = CHAIN_OF_STARS
+    return BoardShape(name, stars)
+
+
 class PathFinder:
     """Finds all given paths from the start port to the end port given some
     traversal specifications.
 
     === Private Attributes ===
     _mode:
-        Specifies the flavour of traversal algorithm to be used when finding
-        paths to the end port.
-    _passport_used:
-        Whether the passport has been used on the currently traversed path.
-        Only used when mode = 3.
+        The preset mode whose traversal rules are used, or None if custom
+        rules were given.
+    _rules:
+        The rules specifying how the board may be traversed.
     _num_paths_found:
         The number of paths found up at any given point during the running of
         the algorithm.
     _board:
         The board being traversed.
 
+    _neighbors:
+        The IDs of the settlements that may be entered from each settlement,
+        indexed by settlement ID. Compiled from _rules.
+    _limits:
+        The number of times each settlement may be entered without a
+        passport, indexed by settlement ID. Compiled from _rules.
+    _passport_ok:
+        Whether a passport can be used to enter each settlement, indexed by
+        settlement ID. Compiled from _rules.
+    _finish_id:
+        The ID of the finish port.
+    _passports_left:
+        The number of passports left on the currently traversed path.
+
+    _meet_in_the_middle:
+        Whether whole counts should be found by meeting in the middle rather
+        than by a depth first search.
+    _use_symmetry:
+        Whether interchangeable settlements should only be explored once,
+        with the number of paths found multiplied back up. Never used while
+        recording paths.
+    _class_ids:
+        The index of the interchangeable class of each settlement, indexed by
+        settlement ID.
+    _class_sizes:
+        The number of settlements in each interchangeable class.
+    _symmetric:
+        Whether each settlement has others interchangeable with it that
+        should be grouped together, indexed by settlement ID.
+    _visits:
+        The number of times each settlement appears on the current path,
+        indexed by settlement ID.
+
     _record_paths:
         Whether paths should be recorded.
     _cur_path:
         The current path.
     _paths:
         To be used for debugging. Stores the settlements along the paths found.
+
+    _record_road_usage:
+        Whether the number of paths using each road should be recorded.
+    _road_usage:
+        The number of paths found so far that use each road, keyed by the
+        greater and then the smaller ID of the road's settlements. Paths
+        standing in for interchangeable paths are counted with their weight.
+    _roads_on_path:
+        The number of times each road has been taken on the current path,
+        keyed like _road_usage.
+
+    _record_settlement_usage:
+        Whether the number of paths through each settlement should be
+        recorded.
+    _settlement_usage:
+        The number of paths found so far that enter each settlement, indexed
+        by settlement ID. Paths standing in for interchangeable paths are
+        counted with their weight.
+
+    _record_lengths:
+        Whether the number of paths of each length should be recorded.
+    _length_counts:
+        The number of paths found so far of each length, in roads taken,
+        indexed by length. Only as long as the longest path found.
+
+    _split_depth:
+        The depth at which the search tree is partitioned between workers, or
+        -1 if the whole tree is searched.
+    _num_parts:
+        The number of parts the search tree is partitioned into.
+    _part:
+        The part of the search tree explored by this pathfinder. Paths shorter
+        than _split_depth are only counted by part 0.
+    _nodes_at_split:
+        The number of nodes met at _split_depth so far.
+
+    _shape:
+        The recognised shape of the board, if its paths are to be counted by
+        closed form rather than by searching.
+    _num_nodes:
+        The number of nodes expanded by the current search.
+    _stats:
+        How the most recent number of paths was found. 'engine' is the engine
+        used, one of CLOSED_FORM, SEARCH or MEET_IN_THE_MIDDLE, 'shape' is the
+        name of the board shape recognised or None, and 'nodes' is the number
+        of nodes expanded by the search, or of half path states met in the
+        middle.
+
+    _prune:
+        Whether to backtrack from settlements that can no longer reach the
+        finish port.
+    _cut_log:
+        The IDs and visit limits of the settlements cut off on the current
+        path, in the order they were cut off, so they can be restored when
+        backtracking. Settlements known to be unable to reach the finish
+        port are cut off by setting their limit in _limits to -1, which no
+        number of visits can be under or at.
+    _reach_marks:
+        The number of the latest reachability search to reach each
+        settlement, indexed by settlement ID.
+    _num_reach_searches:
+        The number of reachability searches made by the current search.
+
+    _half_bits:
+        The bit standing for each settlement in the signature of a half path,
+        indexed by settlement ID. 0 for settlements that are never counted,
+        namely the ports and settlements without a visit limit.
+    _bit_owners:
+        The ID of the settlement standing for each bit of a signature.
+    _can_sum_subsets:
+        Whether half paths can be joined by summing over subsets, which
+        needs every settlement with a visit limit to have a limit of one, and
+        at most one passport.
     """
 
-    _mode: int
-    _passport_used: bool
+    _mode: Optional[int]
+    _rules: TraversalRules
     _num_paths_found: int
     _board: Board
 
+    _neighbors: List[List[int]]
+    _limits: List[int]
+    _passport_ok: List[bool]
+    _finish_id: int
+    _passports_left: int
+
+    _meet_in_the_middle: bool
+    _use_symmetry: bool
+    _class_ids: List[int]
+    _class_sizes: List[int]
+    _symmetric: List[bool]
+    _visits: List[int]
+
     _record_paths: bool
     _cur_path: List[Settlement]
     _paths: List[List[Settlement]]
 
-    def __init__(self, board: Board, mode: int,
-                 record_paths: bool = False) -> None:
+    _record_road_usage: bool
+    _road_usage: Dict[Tuple[int, int], int]
+    _roads_on_path: Dict[Tuple[int, int], int]
+
+    _record_settlement_usage: bool
+    _settlement_usage: List[int]
+
+    _record_lengths: bool
+    _length_counts: List[int]
+
+    _split_depth: int
+    _num_parts: int
+    _part: int
+    _nodes_at_split: int
+
+    _shape: Optional[BoardShape]
+    _num_nodes: int
+    _stats: Dict[str, object]
+
+    _prune: bool
+    _cut_log: List[Tuple[int, int]]
+    _reach_marks: List[int]
+    _num_reach_searches: int
+
+    _half_bits: List[int]
+    _bit_owners: List[int]
+    _can_sum_subsets: bool
+
+    # Attributes are read on every node of the search, which is faster from
+    # slots than from an instance dictionary with this many keys.
+    __slots__ = ('_mode', '_rules', '_num_paths_found', '_board', '_neighbors',
+                 '_limits', '_passport_ok', '_finish_id', '_passports_left',
+                 '_meet_in_the_middle', '_use_symmetry', '_class_ids',
+                 '_class_sizes', '_symmetric',
+                 '_visits', '_record_paths', '_cur_path', '_paths',
+                 '_record_road_usage', '_road_usage', '_roads_on_path',
+                 '_record_settlement_usage', '_settlement_usage',
+                 '_record_lengths', '_length_counts', '_split_depth',
+                 '_num_parts', '_part', '_nodes_at_split', '_shape',
+                 '_num_nodes', '_stats', '_prune', '_cut_log',
+                 '_reach_marks', '_num_reach_searches', '_half_bits',
+                 '_bit_owners', '_can_sum_subsets')
+
+    def __init__(self, board: Board, mode: Union[int, TraversalRules],
+                 record_paths: bool = False,
+                 use_symmetry: bool = True,
+                 use_closed_form: bool = True,
+                 prune_unreachable: bool = False,
+                 meet_in_the_middle: bool = False) -> None:
         """Initialises a pathfinder ready to find all paths through the given
         <board>. Will only traverse the board according to the rules
-        specified by <mode>. """
+        specified by <mode>, either one of the preset modes in MODE_RULES or
+        custom TraversalRules. Interchangeable settlements are only explored
+        once when counting iff <use_symmetry>. Boards of a recognised shape
+        are counted by closed form iff <use_closed_form>. Settlements that
+        can no longer reach the finish port are skipped iff
+        <prune_unreachable>, which checks for them whenever a settlement
+        becomes impassable. This saves expanding dead ends on sparse boards,
+        but costs more than it saves on dense ones. Whole counts are found by
+        meeting in the middle iff <meet_in_the_middle>, which pays off on
+        boards with many settlements without a visit limit, but doesn't make
+        use of interchangeable settlements."""
         self._board = board
-        self._passport_used = False
         self._num_paths_found = 0
-        self._mode = mode
+        if isinstance(mode, TraversalRules):
+            self._mode = None
+            self._rules = mode
+        else:
+            self._mode = mode
+            self._rules = MODE_RULES[mode]
         self._record_paths = record_paths
         self._cur_path = []
         self._paths = []
 
+        # Compile the rules into tables for the traversal.
+        self._neighbors, self._limits, self._passport_ok = \
+            self._rules.compile(board)
+        self._finish_id = [sett.ID for sett in board.settlements
+                           if sett.is_finish()][0]
+        self._order_neighbors()
+        self._passports_left = self._rules.num_passports
+
+        self._meet_in_the_middle = meet_in_the_middle
+        self._use_symmetry = use_symmetry
+        self._class_ids = [0] * board.get_size()
+        self._class_sizes = []
+        for i, group in enumerate(board.get_interchangeable_classes()):
+            self._class_sizes.append(len(group))
+            for sett in group:
+                self._class_ids[sett.ID] = i
+        self._symmetric = [use_symmetry and self._class_sizes[class_id] > 1
+                           for class_id in self._class_ids]
+        self._visits = [0] * board.get_size()
+
+        self._record_road_usage = False
+        self._road_usage = {}
+        self._roads_on_path = {}
+
+        self._record_settlement_usage = False
+        self._settlement_usage = [0] * board.get_size()
+
+        self._record_lengths = False
+        self._length_counts = []
+
+        self._split_depth = -1
+        self._num_parts = 1
+        self._part = 0
+        self._nodes_at_split = 0
+
+        # The closed forms only hold for the preset modes.
+        self._shape = None
+        if use_closed_form and self._mode is not None:
+            self._shape = recognize_board_shape(board)
+        self._num_nodes = 0
+        self._stats = {}
+
+        self._prune = prune_unreachable
+        self._cut_log = []
+        self._reach_marks = [0] * board.get_size()
+        self._num_reach_searches = 0
+
+        self._half_bits = []
+        self._bit_owners = []
+        for sett in board.settlements:
+            if sett.is_start() or sett.is_finish() or \
+                    self._limits[sett.ID] == UNLIMITED:
+                self._half_bits.append(0)
+            else:
+                self._half_bits.append(1 << len(self._bit_owners))
+                self._bit_owners.append(sett.ID)
+        self._can_sum_subsets = self._rules.num_passports <= 1 and \
+            all(self._limits[s_id] == 1 for s_id in self._bit_owners)
+
     def find_num_paths(self) -> int:
         """Returns the number of paths from the start port to the finish port
         using the given traversal rules."""
+        # Only whole counts have a closed form.
+        searching_all = self._split_depth == -1 and not self._record_paths \
+            and not self._record_road_usage and not self._record_lengths \
+            and not self._record_settlement_usage
+        if self._shape is not None and searching_all:
+            self._stats = {'engine': CLOSED_FORM, 'shape': self._shape.name,
+                           'nodes': 0}
+            return self._shape.count_paths(self._mode)
+        if self._meet_in_the_middle and searching_all:
+            return self._count_by_meeting_in_the_middle()
+
         start_port = self._board.start_port
-        self._depth_first_complete_traversal(start_port)
+        self._depth_first_complete_traversal(start_port.ID)
         rtrn = self._num_paths_found
+        self._stats = {'engine': SEARCH, 'shape': None,
+                       'nodes': self._num_nodes}
         self._num_paths_found = 0
+        self._num_nodes = 0
+        self._reach_marks = [0] * self._board.get_size()
+        self._num_reach_searches = 0
         return rtrn
 
+    def _count_by_meeting_in_the_middle(self) -> int:
+        """Returns the number of paths from the start port to the finish port
+        using the given traversal rules, by meeting in the middle.
+
+        Half paths are grown a road at a time out from both ports. A path of
+        L roads is counted by joining its first ceil(L / 2) roads, grown from
+        the start port, with its last floor(L / 2) roads, grown from the
+        finish port. Whether a path is allowed only depends on how many times
+        it enters each settlement, not on the order, so half paths ending at
+        the same settlement with the same signature are merged and counted
+        together. The settlement met at is entered by the first half, so
+        half paths grown from the finish port leave their end out."""
+        start_id = self._board.start_port.ID
+        finish_id = self._finish_id
+        empty = (0, (), 0)
+        num_paths = 0
+        num_states = 2
+
+        # A path of one road has nothing to join.
+        if finish_id in self._neighbors[start_id]:
+            num_paths += 1
+
+        prefixes = {(start_id, empty): 1}
+        prev_suffixes = {(finish_id, empty): 1}
+        level = 0
+        while True:
+            level += 1
+            prefixes = self._grow_half_paths(prefixes)
+            num_states += len(prefixes)
+            # No path of 2 * level - 1 roads or more.
+            if not prefixes:
+                break
+            if level > 1:
+                num_paths += self._join_half_paths(prefixes, prev_suffixes)
+
+            suffixes = self._grow_half_paths(prev_suffixes, True)
+            num_states += len(suffixes)
+            num_paths += self._join_half_paths(prefixes, suffixes)
+            # No path of 2 * level + 1 roads or more.
+            if not suffixes:
+                break
+            prev_suffixes = suffixes
+
+        self._stats = {'engine': MEET_IN_THE_MIDDLE, 'shape': None,
+                       'nodes': num_states}
+        return num_paths
+
+    def get_stats(self) -> Dict[str, object]:
+        """Returns how the most recent number of paths was found. See _stats
+        for the meaning of each entry."""
+        return dict(self._stats)
+
     def get_paths(self) -> Tuple[int, List[List[Settlement]]]:
         """Returns the number of paths from the start port to the finish port
         using the given traversal rules. Also returns the contents of each path.
@@ -423,71 +1031,595 @@ class PathFinder:
         self._paths = []
         return rtrn
 
-    iters: int = 0
-    def _depth_first_complete_traversal(self, sett: Settlement) -> None:
-        """From the current <sett>, recursively traverse every allowable path
-        to the finish port. Increment counter whenever a new path is found."""
-        # DEBUG TODO REMOVE
-        self.iters += 1
-        if self.iters > len(self._board.get_all_roads()) ** 4:
-            return
+    def find_length_histogram(self) -> Dict[int, int]:
+        """Returns the number of paths from the start port to the finish port
+        using the given traversal rules of each length, in roads taken.
+        Lengths without any paths are left out."""
+        self._record_lengths = True
+        self.find_num_paths()
+        histogram = {length: count
+                     for length, count in enumerate(self._length_counts)
+                     if count > 0}
+        self._record_lengths = False
+        self._length_counts = []
+        return histogram
+
+    def find_road_usage(self) -> Tuple[int, List[int]]:
+        """Returns the number of paths from the start port to the finish port
+        using the given traversal rules, along with the number of those paths
+        that use each road, in the order given by Board.get_all_roads()."""
+        num_paths, raw_usage = self.find_part_road_usage(0, 1, -1)
+        return num_paths, self.share_road_usage(raw_usage)
+
+    def find_part_road_usage(self, part: int, num_parts: int,
+                             split_depth: int) -> Tuple[int, List[int]]:
+        """Returns the number of paths found in <part> of <num_parts> of the
+        search, along with the number of them using each road, in the order
+        given by Board.get_all_roads(). The parts are formed by dealing out
+        the nodes of the search tree at <split_depth> in turn, or every part
+        is the whole search if <split_depth> is -1. See choose_split_depth.
+
+        When interchangeable settlements are only explored once, the usage of
+        a road is credited to the road actually explored rather than being
+        shared out between equivalent roads. The usage found by every part
+        can be summed and then shared out with share_road_usage."""
+        self._set_part(part, num_parts, split_depth)
+        self._record_road_usage = True
+        num_paths = self.find_num_paths()
+        raw_usage = [self._road_usage.get((road[0].ID, road[1].ID), 0)
+                     for road in self._board.get_all_roads()]
+        self._record_road_usage = False
+        self._road_usage = {}
+        self._roads_on_path = {}
+        self._set_part(0, 1, -1)
+        return num_paths, raw_usage
+
+    def share_road_usage(self, raw_usage: List[int]) -> List[int]:
+        """Shares the <raw_usage> of each road, in the order given by
+        Board.get_all_roads(), out evenly among the roads it is
+        interchangeable with, and returns the usage of each road in the same
+        order.
+
+        Swapping interchangeable settlements maps the paths found onto
+        themselves, so roads joining the same two classes of settlements are
+        used by the same number of paths."""
+        if not self._use_symmetry:
+            return raw_usage[:]
+
+        # Sum the usage of each group of interchangeable roads.
+        group_usage = {}
+        group_sizes = {}
+        road_groups = []
+        for road, usage in zip(self._board.get_all_roads(), raw_usage):
+            group = tuple(sorted(self._class_ids[sett.ID] for sett in road))
+            group_usage[group] = group_usage.get(group, 0) + usage
+            group_sizes[group] = group_sizes.get(group, 0) + 1
+            road_groups.append(group)
+
+        return [group_usage[group] // group_sizes[group]
+                for group in road_groups]
+
+    def choose_split_depth(self, num_parts: int) -> int:
+        """Returns the shallowest depth of the search tree with enough nodes
+        to share between <num_parts> parts, or -1 if there isn't one."""
+        depth = 1
+        num_nodes = self._count_nodes_at_depth(depth)
+        while 0 < num_nodes < num_parts * SUBTREES_PER_WORKER:
+            depth += 1
+            num_nodes = self._count_nodes_at_depth(depth)
+        if num_nodes == 0:
+            return -1
+        return depth
+
+    def find_settlement_usage(self) -> Tuple[int, List[int]]:
+        """Returns the number of paths from the start port to the finish port
+        using the given traversal rules, along with the number of those paths
+        that pass through each settlement, in the order of
+        Board.settlements."""
+        num_paths, raw_usage = self._find_raw_settlement_usage()
+        return num_paths, self._symmetrise_settlement_usage(raw_usage)
+
+    def _find_raw_settlement_usage(self) -> Tuple[int, List[int]]:
+        """Returns the number of paths found, along with the number of them
+        through each settlement, indexed by settlement ID.
+
+        Paths are credited to the settlements on the path actually explored,
+        as with find_part_road_usage."""
+        self._record_settlement_usage = True
+        num_paths = self.find_num_paths()
+        # Every path starts at the start port, which is never entered again.
+        self._settlement_usage[self._board.start_port.ID] = num_paths
+        rtrn = num_paths, self._settlement_usage
+        self._record_settlement_usage = False
+        self._settlement_usage = [0] * self._board.get_size()
+        return rtrn
 
+    def _symmetrise_settlement_usage(self, raw_usage: List[int]) \
+            -> List[int]:
+        """Shares the <raw_usage> of each settlement out evenly among the
+        settlements it is interchangeable with, and returns the usage of each
+        settlement in the order of Board.settlements."""
+        settlements = self._board.settlements
+        if not self._use_symmetry:
+            return [raw_usage[sett.ID] for sett in settlements]
 
+        class_usage = [0] * len(self._class_sizes)
+        for sett in settlements:
+            class_usage[self._class_ids[sett.ID]] += raw_usage[sett.ID]
+        return [class_usage[self._class_ids[sett.ID]] //
+                self._class_sizes[self._class_ids[sett.ID]]
+                for sett in settlements]
+
+    def _set_part(self, part: int, num_parts: int, split_depth: int) -> None:
+        """Restricts the search to <part> of <num_parts>, which are formed by
+        dealing out the nodes of the search tree at <split_depth> in turn. A
+        <part> of -1 stops the search at <split_depth> entirely."""
+        self._part = part
+        self._num_parts = num_parts
+        self._split_depth = split_depth
+        self._nodes_at_split = 0
+
+    def _count_nodes_at_depth(self, depth: int) -> int:
+        """Returns the number of nodes in the search tree at <depth>."""
+        self._set_part(-1, 1, depth)
+        self.find_num_paths()
+        rtrn = self._nodes_at_split
+        self._set_part(0, 1, -1)
+        return rtrn
+
+    def _depth_first_complete_traversal(self, s_id: int, weight: int = 1,
+                                        depth: int = 0) -> None:
+        """From the settlement with ID <s_id>, recursively traverse every
+        allowable path to the finish port. Increment counter by <weight>, the
+        number of equivalent paths the current path stands for, whenever a
+        new path is found. <depth> is the number of roads taken to reach the
+        settlement."""
+        # Only search the subtrees belonging to this part.
+        if depth == self._split_depth:
+            self._nodes_at_split += 1
+            if (self._nodes_at_split - 1) % self._num_parts != self._part:
+                return
 
         # Add this node to the current path.
+        self._num_nodes += 1
         if self._record_paths:
-            self._cur_path.append(sett)
+            self._cur_path.append(self._board.settlements[s_id])
 
         # We've reached the finish port. This path is complete.
-        if sett.is_finish():
-            self._num_paths_found += 1
+        if s_id == self._finish_id:
+            # Paths above the split are seen by every part.
+            if depth >= self._split_depth or self._part == 0:
+                self._num_paths_found += weight
+                if self._record_lengths:
+                    lengths = self._length_counts
+                    if len(lengths) <= depth:
+                        lengths.extend([0] * (depth + 1 - len(lengths)))
+                    lengths[depth] += weight
             if self._record_paths:
                 self._paths.append(self._cur_path[:])
                 self._cur_path.pop()
             return
 
-        # Don't return to this settlement in future traversals.
-        if self._mode == 1:
-            sett.set_grey()
-        elif sett.is_village() and sett.is_white():
-            sett.set_grey()
-        # A passport was used to traverse this node.
-        elif sett.is_grey():
-            sett.set_black()
-
-        # Recurse to each adjacent vertex that isn't grey.
-        for adj_sett in self._board.get_white_neighbors(sett):
-            self._depth_first_complete_traversal(adj_sett)
-
-        # Try to use the passport if it's available.
-        self._try_to_use_passport(sett)
-
-        # We've completed traversing this settlement along this path.
-        # Update its colour to mark it as available.
-        if sett.is_grey():
-            sett.set_white()
-        if sett.is_black():
-            sett.set_grey()
+        visits = self._visits
+        limits = self._limits
+        neighbors = self._neighbors[s_id]
+        visits[s_id] += 1
+
+        # Find out what can no longer reach the finish port if this
+        # settlement may have cut some of the board off from it.
+        made_cut = self._prune and not self._is_passable(s_id) and \
+            (depth == 0 or self._may_disconnect(s_id))
+        if made_cut:
+            num_cut = len(self._cut_log)
+            self._cut_unreachable(s_id)
+
+        # Recurse to each adjacent settlement that can still be entered
+        # without a passport. Untouched interchangeable settlements are
+        # grouped together and only explored once.
+        symmetric = self._symmetric
+        group = not self._record_paths
+        record_usage = self._record_road_usage or \
+            self._record_settlement_usage
+        # Class index to representative and number of settlements.
+        grouped = None
+        for adj_id in neighbors:
+            if visits[adj_id] < limits[adj_id]:
+                if group and symmetric[adj_id] and visits[adj_id] == 0:
+                    if grouped is None:
+                        grouped = {}
+                    class_id = self._class_ids[adj_id]
+                    rep_id, num_equiv = grouped.get(class_id, (adj_id, 0))
+                    grouped[class_id] = rep_id, num_equiv + 1
+                elif record_usage:
+                    self._take_road(s_id, adj_id, weight, depth)
+                else:
+                    self._depth_first_complete_traversal(adj_id, weight,
+                                                         depth + 1)
+        if grouped is not None:
+            for rep_id, num_equiv in grouped.values():
+                self._take_road(s_id, rep_id, weight * num_equiv, depth)
+
+        # Use a passport to enter each adjacent settlement that has reached
+        # its limit, if one is available.
+        if self._passports_left:
+            passport_ok = self._passport_ok
+            self._passports_left -= 1
+            for adj_id in neighbors:
+                if visits[adj_id] == limits[adj_id] and passport_ok[adj_id]:
+                    self._take_road(s_id, adj_id, weight, depth)
+            self._passports_left += 1
 
         # Remove this settlement from the current path.
+        visits[s_id] -= 1
+        if made_cut:
+            while len(self._cut_log) > num_cut:
+                c_id, limit = self._cut_log.pop()
+                limits[c_id] = limit
         if self._record_paths:
             self._cur_path.pop()
 
-    def _try_to_use_passport(self, sett: Settlement) -> None:
-        """If the passport hasn't already been used along this path, will
-        attempt to use the passport to traverse into an adjacent grey village.
-        Will only do so if mode = 3."""
-        # We can't use the passport.
-        if self._mode != 3 or self._passport_used:
+    def _is_passable(self, s_id: int) -> bool:
+        """Returns whether the settlement with ID <s_id> can still be entered,
+        with or without a passport, on the current path."""
+        visits = self._visits[s_id]
+        limit = self._limits[s_id]
+        if visits < limit:
+            return True
+        return visits == limit and self._passports_left > 0 and \
+            self._passport_ok[s_id]
+
+    def _may_disconnect(self, s_id: int) -> bool:
+        """Returns whether no longer being able to enter the settlement with
+        ID <s_id> may cut other settlements off from the finish port.
+
+        Removing a settlement with at most one passable neighbor can't
+        disconnect the rest of the board."""
+        visits = self._visits
+        limits = self._limits
+        passport_ok = self._passport_ok
+        passports = self._passports_left > 0
+        num_passable = 0
+        for adj_id in self._neighbors[s_id]:
+            if visits[adj_id] < limits[adj_id] or \
+                    (passports and passport_ok[adj_id] and
+                     visits[adj_id] == limits[adj_id]):
+                num_passable += 1
+                if num_passable > 1:
+                    return True
+        return False
+
+    def _cut_unreachable(self, s_id: int) -> None:
+        """Cuts off the settlements that can no longer reach the finish port
+        now that the settlement with ID <s_id> can't be entered.
+
+        Anything cut off must have been connected to the finish port through
+        a neighbor of the settlement, so only the neighbors are searched
+        from. Each search heads for the finish port first and stops as soon
+        as it finds it, or a settlement already found to reach it. Ignores
+        the order in which settlements would have to be entered and how many
+        times, so a settlement cut off certainly can't reach the finish
+        port."""
+        all_neighbors = self._neighbors
+        visits = self._visits
+        limits = self._limits
+        passport_ok = self._passport_ok
+        marks = self._reach_marks
+        finish_id = self._finish_id
+        passports = self._passports_left > 0
+        self._num_reach_searches += 1
+        reaches = self._num_reach_searches
+
+        for start_id in all_neighbors[s_id]:
+            if marks[start_id] == reaches:
+                continue
+            if visits[start_id] >= limits[start_id] and \
+                    not (passports and passport_ok[start_id] and
+                         visits[start_id] == limits[start_id]):
+                continue
+
+            # Search outwards from this neighbor.
+            self._num_reach_searches += 1
+            seen = self._num_reach_searches
+            marks[start_id] = seen
+            found = start_id == finish_id
+            component = [start_id]
+            stack = [start_id]
+            while stack and not found:
+                # Neighbors are ordered closest to the finish port first, so
+                # push them in reverse to pop the closest first.
+                for adj_id in reversed(all_neighbors[stack.pop()]):
+                    if marks[adj_id] == reaches or adj_id == finish_id:
+                        found = True
+                        break
+                    if marks[adj_id] == seen:
+                        continue
+                    if visits[adj_id] < limits[adj_id] or \
+                            (passports and passport_ok[adj_id] and
+                             visits[adj_id] == limits[adj_id]):
+                        marks[adj_id] = seen
+                        component.append(adj_id)
+                        stack.append(adj_id)
+
+            for c_id in component:
+                if found:
+                    marks[c_id] = reaches
+                else:
+                    self._cut_log.append((c_id, limits[c_id]))
+                    limits[c_id] = -1
+
+    def _order_neighbors(self) -> None:
+        """Sorts the neighbors of each settlement so that those closest to the
+        finish port are explored first."""
+        # Breadth first search out from the finish port.
+        distances = [len(self._neighbors)] * len(self._neighbors)
+        distances[self._finish_id] = 0
+        queue = [self._finish_id]
+        for s_id in queue:
+            for adj_id in self._neighbors[s_id]:
+                if distances[adj_id] > distances[s_id] + 1:
+                    distances[adj_id] = distances[s_id] + 1
+                    queue.append(adj_id)
+
+        for neighbors in self._neighbors:
+            neighbors.sort(key=lambda adj_id: distances[adj_id])
+
+    def _take_road(self, s_id: int, adj_id: int, weight: int,
+                   depth: int) -> None:
+        """Continues the current path from the settlement with ID <s_id>
+        along the road to the settlement with ID <adj_id>, at <depth>.
+        Records how many of the paths found use the road and pass through
+        the settlement if required."""
+        if not self._record_road_usage and \
+                not self._record_settlement_usage:
+            self._depth_first_complete_traversal(adj_id, weight, depth + 1)
             return
 
-        # Use passport to traverse into each allowable adjacent settlement.
-        # Update passport status.
-        adj_setts = self._board.get_grey_village_neighbors(sett)
-        self._passport_used = True
-        for adj_sett in adj_setts:
-            self._depth_first_complete_traversal(adj_sett)
-        self._passport_used = False
+        num_before = self._num_paths_found
+        # Every path found in this subtree passes through the settlement.
+        # Only count them if it hasn't already been entered earlier on these
+        # paths.
+        first_entry = self._visits[adj_id] == 0
+        if not self._record_road_usage:
+            self._depth_first_complete_traversal(adj_id, weight, depth + 1)
+        else:
+            road = max(s_id, adj_id), min(s_id, adj_id)
+            times_taken = self._roads_on_path.get(road, 0)
+            self._roads_on_path[road] = times_taken + 1
+            self._depth_first_complete_traversal(adj_id, weight, depth + 1)
+            self._roads_on_path[road] = times_taken
+
+            # Likewise for the road.
+            if times_taken == 0:
+                self._road_usage[road] = self._road_usage.get(road, 0) + \
+                    self._num_paths_found - num_before
+
+        if self._record_settlement_usage and first_entry:
+            self._settlement_usage[adj_id] += \
+                self._num_paths_found - num_before
+
+    def _grow_half_paths(self, half_paths: Dict[Tuple[int, Tuple], int],
+                         from_finish: bool = False) \
+            -> Dict[Tuple[int, Tuple], int]:
+        """Returns the half paths made by taking one more road from the end of
+        each of <half_paths>, merging those that are interchangeable.
+
+        Half paths are keyed by the ID of the settlement they end at and
+        their signature, and map to the number of half paths with that key.
+        A signature is the mask of the bits in _half_bits of the settlements
+        entered, the sorted IDs and counts of the settlements entered more
+        than once, and the number of passports used. Half paths never enter
+        either port. Half paths grown <from_finish> haven't entered the
+        settlement they end at, and only do so when grown past it."""
+        grown = {}
+        for (s_id, signature), count in half_paths.items():
+            if from_finish:
+                signature = self._enter_half_path(signature, s_id)
+                if signature is None:
+                    continue
+            for adj_id in self._neighbors[s_id]:
+                if adj_id == self._finish_id:
+                    continue
+                new_signature = self._enter_half_path(signature, adj_id)
+                if new_signature is None:
+                    continue
+                # Only check that the new end could be entered.
+                if from_finish:
+                    new_signature = signature
+                key = adj_id, new_signature
+                grown[key] = grown.get(key, 0) + count
+        return grown
+
+    def _enter_half_path(self, signature: Tuple, s_id: int) \
+            -> Optional[Tuple]:
+        """Returns the signature of a half path with <signature> once it has
+        entered the settlement with ID <s_id>, or None if it can't."""
+        bit = self._half_bits[s_id]
+        if not bit:
+            return signature
+        mask, repeats, passports_used = signature
+        limit = self._limits[s_id]
+
+        # Find how many times the settlement has been entered.
+        times_entered = 0
+        if mask & bit:
+            times_entered = dict(repeats).get(s_id, 1)
+        if times_entered >= limit:
+            if times_entered > limit or not self._passport_ok[s_id] or \
+                    passports_used == self._rules.num_passports:
+                return None
+            passports_used += 1
+
+        if times_entered > 0:
+            counts = dict(repeats)
+            counts[s_id] = times_entered + 1
+            repeats = tuple(sorted(counts.items()))
+        return mask | bit, repeats, passports_used
+
+    def _join_half_paths(self, prefixes: Dict[Tuple[int, Tuple], int],
+                         suffixes: Dict[Tuple[int, Tuple], int]) -> int:
+        """Returns the number of paths made by joining a half path in
+        <prefixes>, grown from the start port, to a half path in <suffixes>,
+        grown from the finish port, ending at the same settlement. See
+        _grow_half_paths for the format of half paths.
+
+        Only settlements entered by both halves can stop them from joining,
+        so signatures are cut down to those settlements. They are
+        then joined by summing over subsets where possible and cheaper, or
+        else compared pair by pair."""
+        prefixes_at = self._index_half_paths(prefixes)
+        suffixes_at = self._index_half_paths(suffixes)
+
+        num_paths = 0
+        for s_id, (prefix_mask, meeting_prefixes) in prefixes_at.items():
+            if s_id not in suffixes_at:
+                continue
+            suffix_mask, meeting_suffixes = suffixes_at[s_id]
+            shared = prefix_mask & suffix_mask
+            num_shared = bin(shared).count('1')
+            num_pairs = len(meeting_prefixes) * len(meeting_suffixes)
+            if self._can_sum_subsets and num_shared << num_shared < \
+                    num_pairs * SUBSET_SUM_COST_RATIO:
+                num_paths += self._join_by_subset_sums(
+                    shared, meeting_prefixes, meeting_suffixes)
+                continue
+
+            cut_prefixes = self._cut_signatures(meeting_prefixes, shared)
+            cut_suffixes = list(
+                self._cut_signatures(meeting_suffixes, shared).items())
+            for signature, count in cut_prefixes.items():
+                for other_signature, other_count in cut_suffixes:
+                    if self._can_join(signature, other_signature):
+                        num_paths += count * other_count
+        return num_paths
+
+    def _join_by_subset_sums(self, shared: int,
+                             prefixes: List[Tuple[Tuple, int]],
+                             suffixes: List[Tuple[Tuple, int]]) -> int:
+        """Returns the number of paths made by joining a half path with one of
+        the signatures in <prefixes> to one with a signature in <suffixes>,
+        all meeting at the same settlement, where <shared> is the mask of the
+        settlements entered by both halves. Only to be used if
+        _can_sum_subsets.
+
+        Two half paths join if the settlements they share can be entered
+        again with the passports they have left. Without a passport to spare
+        they can't share any, and with one they can share one settlement
+        neither of them has used it on."""
+        # Renumber the shared settlements from bit 0.
+        bits = []
+        for i in range(shared.bit_length()):
+            if shared >> i & 1:
+                bits.append(i)
+
+        def compress(mask: int) -> int:
+            compressed = 0
+            for j, i in enumerate(bits):
+                compressed |= (mask >> i & 1) << j
+            return compressed
+
+        passport_bits = 0
+        for j, i in enumerate(bits):
+            if self._passport_ok[self._bit_owners[i]]:
+                passport_bits |= 1 << j
+
+        # Count the suffixes that used no passport, and those that used one,
+        # by the subset of the shared settlements they entered.
+        size = 1 << len(bits)
+        free = [0] * size
+        paid = [0] * size
+        for (mask, _, passports_used), count in suffixes:
+            table = paid if passports_used else free
+            table[compress(mask)] += count
+
+        # Sum each table over subsets, so that each entry counts the
+        # suffixes that entered no shared settlements outside its mask.
+        tables = [free, paid]
+        for t, table in enumerate(tables):
+            if not any(table):
+                continue
+            for j in range(len(bits)):
+                step = 1 << j
+                table = [table[mask] + table[mask ^ step] if mask & step
+                         else table[mask] for mask in range(size)]
+            tables[t] = table
+        free, paid = tables
+
+        num_passports = self._rules.num_passports
+        num_paths = 0
+        for (mask, _, passports_used), count in prefixes:
+            compressed = compress(mask)
+            rest = (size - 1) ^ compressed
+            matches = free[rest]
+            if passports_used < num_passports:
+                matches += paid[rest]
+                # Suffixes sharing exactly one more settlement, which the
+                # passport is used to enter again.
+                common = compressed & passport_bits
+                while common:
+                    bit = common & -common
+                    common ^= bit
+                    matches += free[rest | bit] - free[rest]
+            num_paths += count * matches
+        return num_paths
+
+    def _index_half_paths(self, half_paths: Dict[Tuple[int, Tuple], int]) \
+            -> Dict[int, Tuple[int, List[Tuple[Tuple, int]]]]:
+        """Returns the signatures of <half_paths> and their counts, indexed by
+        the ID of the settlement they end at, along with the mask of every
+        settlement entered by any of them."""
+        index = {}
+        for (s_id, signature), count in half_paths.items():
+            mask, entries = index.get(s_id, (0, []))
+            entries.append((signature, count))
+            index[s_id] = mask | signature[0], entries
+        return index
+
+    def _cut_signatures(self, signatures: List[Tuple[Tuple, int]],
+                        mask: int) -> Dict[Tuple, int]:
+        """Returns the total counts of <signatures> once cut down to the
+        settlements in <mask>. The number of passports used is kept."""
+        half_bits = self._half_bits
+        cut = {}
+        for (sig_mask, repeats, passports_used), count in signatures:
+            if repeats:
+                repeats = tuple((s_id, times) for s_id, times in repeats
+                                if half_bits[s_id] & mask)
+            key = sig_mask & mask, repeats, passports_used
+            cut[key] = cut.get(key, 0) + count
+        return cut
+
+    def _can_join(self, signature: Tuple, other_signature: Tuple) -> bool:
+        """Returns whether half paths with the given signatures that meet at
+        the same settlement make an allowable path."""
+        mask, repeats, passports_used = signature
+        other_mask, other_repeats, other_passports_used = other_signature
+        passports_used += other_passports_used
+        num_passports = self._rules.num_passports
+        if passports_used > num_passports:
+            return False
+
+        overlap = mask & other_mask
+        if not overlap:
+            return True
+
+        # Work out the passports needed by settlements entered on both
+        # halves.
+        counts = dict(repeats)
+        other_counts = dict(other_repeats)
+        while overlap:
+            bit = overlap & -overlap
+            overlap ^= bit
+            o_id = self._bit_owners[bit.bit_length() - 1]
+            limit = self._limits[o_id]
+            times_entered = counts.get(o_id, 1)
+            other_times_entered = other_counts.get(o_id, 1)
+            total = times_entered + other_times_entered
+            if total > limit + int(self._passport_ok[o_id]):
+                return False
+            passports_used += max(0, total - limit) - \
+                max(0, times_entered - limit) - \
+                max(0, other_times_entered - limit)
+        return passports_used <= num_passports
 
 
 def paths_to_str(paths: List[List[Settlement]]) -> str:
@@ -503,16 +1635,28 @@ def paths_to_str(paths: List[List[Settlement]]) -> str:
     return rtrn
 
 
-def find_and_print_paths(board: Board, print_paths: bool) \
-        -> Tuple[int, ...]:
+def stats_to_str(stats: Dict[str, object]) -> str:
+    """Returns a string representation of the <stats> of a PathFinder."""
+    engine = stats['engine']
+    if stats['shape'] is not None:
+        engine += ' (' + stats['shape'] + ')'
+    return '    Engine: {e}, nodes expanded: {n}'.format(e=engine,
+                                                         n=stats['nodes'])
+
+
+def find_and_print_paths(board: Board, print_paths: bool,
+                         print_stats: bool = False,
+                         meet_in_the_middle: bool = False) -> Tuple[int, ...]:
     """Finds all the given paths along a board and prints a string
     representation of the results. Will print the paths found iff
-    <print_paths>."""
+    <print_paths>, and how they were counted iff <print_stats>. Paths are
+    counted by meeting in the middle iff <meet_in_the_middle>."""
     num_paths = []
 
     # Compute and print for each mode.
     for mode in (1, 2, 3):
-        pf = PathFinder(board, mode, record_paths=print_paths)
+        pf = PathFinder(board, mode, record_paths=print_paths,
+                        meet_in_the_middle=meet_in_the_middle)
 
         # Include traversed paths if requested.
         if not print_paths:
@@ -523,10 +1667,144 @@ def find_and_print_paths(board: Board, print_paths: bool) \
             num_found, paths = pf.get_paths()
             print('MODE {i}: {n}'.format(i=mode, n=num_found))
             print(paths_to_str(paths))
+        if print_stats:
+            print(stats_to_str(pf.get_stats()))
         num_paths.append(num_found)
 
     return tuple(num_paths)
 
 
+def summarise_lengths(histogram: Dict[int, int]) \
+        -> Optional[Tuple[int, int, float]]:
+    """Returns the minimum, maximum and mean length of the paths counted in
+    <histogram>, or None if there aren't any."""
+    num_paths = sum(histogram.values())
+    if num_paths == 0:
+        return None
+    total_length = sum(length * count for length, count in histogram.items())
+    return min(histogram), max(histogram), total_length / num_paths
+
+
+def find_and_print_length_histograms(board: Board) \
+        -> Tuple[Dict[int, int], ...]:
+    """Finds the number of paths of each length along a board in each mode
+    and prints a string representation of the results."""
+    histograms = []
+    for mode in (1, 2, 3):
+        histogram = PathFinder(board, mode).find_length_histogram()
+        print('MODE {i} LENGTHS: {h}'.format(i=mode, h=', '.join(
+            '{l}: {n}'.format(l=length, n=count)
+            for length, count in histogram.items())))
+        summary = summarise_lengths(histogram)
+        if summary is not None:
+            print('    Min: {0}, max: {1}, mean: {2:.2f}'.format(*summary))
+        histograms.append(histogram)
+    return tuple(histograms)
+
+
+def find_path_participation(board: Board) \
+        -> List[Tuple[Settlement, Tuple[int, ...]]]:
+    """Returns each settlement on <board>, in the order of Board.settlements,
+    along with the number of paths found in each mode that pass through it.
+
+    Uses a single search per mode, crediting the paths found below each
+    settlement to it when it's first entered, so the paths themselves are
+    never stored."""
+    usage_by_mode = [PathFinder(board, mode).find_settlement_usage()[1]
+                     for mode in (1, 2, 3)]
+    return [(sett, tuple(usage[i] for usage in usage_by_mode))
+            for i, sett in enumerate(board.settlements)]
+
+
+def find_and_print_path_participation(board: Board) \
+        -> List[Tuple[Settlement, Tuple[int, ...]]]:
+    """Finds the number of paths in each mode through each settlement on
+    <board>, and prints a string representation of the results."""
+    participation = find_path_participation(board)
+    for sett, counts in participation:
+        print('SETTLEMENT {s}: {n}'.format(
+            s=sett.name, n=' '.join(str(count) for count in counts)))
+    return participation
+
+
+def _find_part_road_usage(board: Board, mode: int, part: int,
+                          num_parts: int, split_depth: int) \
+        -> Tuple[int, List[int]]:
+    """Finds the unshared road usage of the given <part> of the search
+    through <board> under <mode>. To be run by worker processes."""
+    pf = PathFinder(board, mode)
+    return pf.find_part_road_usage(part, num_parts, split_depth)
+
+
+def find_road_criticality(board: Board, processes: Optional[int] = None) \
+        -> List[Tuple[Tuple[Settlement, Settlement], Tuple[int, ...]]]:
+    """Returns each road on <board>, in the order given by
+    Board.get_all_roads(), along with the number of paths found in each mode
+    if that road were closed.
+
+    Uses a single search per mode, recording how many paths use each road.
+    The search is shared between <processes> worker processes, which defaults
+    to one per CPU on boards of at least PARALLEL_MIN_SIZE settlements."""
+    if processes is None:
+        if board.get_size() >= PARALLEL_MIN_SIZE:
+            processes = os.cpu_count() or 1
+        else:
+            processes = 1
+
+    if processes > 1:
+        # The same workers are kept for every mode.
+        with Pool(processes) as pool:
+            return _find_road_criticality(board, processes, pool)
+    return _find_road_criticality(board, processes, None)
+
+
+def _find_road_criticality(board: Board, processes: int,
+                           pool: Optional[Pool]) \
+        -> List[Tuple[Tuple[Settlement, Settlement], Tuple[int, ...]]]:
+    """Returns the road criticality of <board>, sharing each search between
+    <processes> parts run on <pool> where the search is large enough."""
+    roads = board.get_all_roads()
+    closed_counts = [[] for _ in roads]
+    for mode in (1, 2, 3):
+        pf = PathFinder(board, mode)
+        split_depth = -1
+        if pool is not None:
+            split_depth = pf.choose_split_depth(processes)
+
+        # Too small to be worth sharing out.
+        if split_depth == -1:
+            num_paths, usage = pf.find_road_usage()
+        else:
+            args = [(board, mode, part, processes, split_depth)
+                    for part in range(processes)]
+            results = pool.starmap(_find_part_road_usage, args)
+
+            num_paths = 0
+            raw_usage = [0] * len(roads)
+            for part_paths, part_usage in results:
+                num_paths += part_paths
+                for i, road_usage in enumerate(part_usage):
+                    raw_usage[i] += road_usage
+            usage = pf.share_road_usage(raw_usage)
+
+        for i, road_usage in enumerate(usage):
+            closed_counts[i].append(num_paths - road_usage)
+
+    return [(road, tuple(counts))
+            for road, counts in zip(roads, closed_counts)]
+
+
+def find_and_print_road_criticality(board: Board) \
+        -> List[Tuple[Tuple[Settlement, Settlement], Tuple[int, ...]]]:
+    """Finds the number of paths in each mode with each road on <board>
+    closed, and prints a string representation of the results."""
+    criticality = find_road_criticality(board)
+    for road, counts in criticality:
+        print('ROAD {a} - {b}: {n}'.format(
+            a=road[0].name, b=road[1].name,
+            n=' '.join(str(count) for count in counts)))
+    return criticality
+
+
 if __name__ == '__main__':
     main()
@@ -1,6 +1,6 @@
 import pytest
 from tests.test_board_construction import max_board_5, one_path_board, \
-    simple_board
+    simple_board, x_board
 
 
 @pytest.mark.parametrize('board', [
@@ -28,3 +28,14 @@ def test_neighborhood(board) -> None:
 
 
 
+def test_interchangeable_classes() -> None:
+    """Tests that only settlements of the same type with the same neighbors
+    are grouped together."""
+    classes = x_board.get_interchangeable_classes()
+    names = [[sett.name for sett in group] for group in classes]
+    assert names == [['InPort'], ['Pallet', 'Viridian'], ['Pewter'],
+                     ['Cerulean', 'Vermilion'], ['OutPort']]
+
+    # Every village on a complete board is adjacent to every other one.
+    classes = max_board_5.get_interchangeable_classes()
+    assert sorted(len(group) for group in classes) == [1, 1, 3]
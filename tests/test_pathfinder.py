@@ -1,4 +1,8 @@
-from Routes import PathFinder
+import pytest
+from Routes import PathFinder, find_road_criticality, \
+    find_path_participation, CHAIN, STAR, CHAIN_OF_STARS, CLOSED_FORM, \
+    SEARCH, MEET_IN_THE_MIDDLE, MODE_RULES, TraversalRules, VILLAGE, CITY, \
+    summarise_lengths
 from tests.test_board_construction import *
 
 def test_one_path_board() -> None:
@@ -29,3 +33,234 @@ def test_simple_board() -> None:
 
 
 
+def test_symmetry_matches_brute_force() -> None:
+    """Tests that exploring one member of each interchangeable class finds
+    the same number of paths as exploring every settlement."""
+    for board in (simple_board, x_board, max_board_5,
+                  get_board(TEST_PATH + 'tests/test_boards/1_c-5_v.txt')):
+        for mode in (1, 2, 3):
+            pf = PathFinder(board, mode, use_closed_form=False)
+            brute_pf = PathFinder(board, mode, use_symmetry=False,
+                                  use_closed_form=False)
+            assert pf.find_num_paths() == brute_pf.find_num_paths()
+
+def test_symmetric_star_board() -> None:
+    """Tests a city surrounded by ten interchangeable villages."""
+    board = get_board(TEST_PATH + 'tests/1_c-10_v.txt')
+    pf = PathFinder(board, 2, use_closed_form=False)
+    assert pf.find_num_paths() == 9864101
+
+    pf = PathFinder(board, 3, use_closed_form=False)
+    assert pf.find_num_paths() == 458680701
+
+def test_road_criticality() -> None:
+    """Tests that the path counts with each road closed match the counts found
+    on a board rebuilt without that road."""
+    board = get_board(TEST_PATH + 'tests/test_boards/demo_input.txt')
+    roads = board.get_all_roads()
+    expected = []
+    for closed in roads:
+        setts = [Settlement(s.name, s.s_type) for s in board.settlements]
+        open_roads = [(setts[a.ID], setts[b.ID]) for a, b in roads
+                      if (a, b) != closed]
+        closed_board = Board(setts, open_roads)
+        expected.append(tuple(PathFinder(closed_board, mode).find_num_paths()
+                              for mode in (1, 2, 3)))
+
+    for processes in (1, 2):
+        criticality = find_road_criticality(board, processes)
+        assert [road for road, _ in criticality] == roads
+        assert [counts for _, counts in criticality] == expected
+
+    # The usage found by each part of a shared search sums to the whole.
+    for mode in (1, 2, 3):
+        pf = PathFinder(board, mode)
+        num_paths = 0
+        raw_usage = [0] * len(roads)
+        for part in range(3):
+            part_paths, part_usage = pf.find_part_road_usage(part, 3, 2)
+            num_paths += part_paths
+            raw_usage = [a + b for a, b in zip(raw_usage, part_usage)]
+        assert (num_paths, pf.share_road_usage(raw_usage)) == \
+            pf.find_road_usage()
+
+
+def test_closed_form() -> None:
+    """Tests that recognised board shapes are counted by closed form, and that
+    the closed forms match the search."""
+    shapes = {
+        'one_city.txt': CHAIN,
+        '1_c-5_v.txt': STAR,
+        'simple_board.txt': None
+    }
+    for file_name, shape in shapes.items():
+        board = get_board(TEST_PATH + 'tests/test_boards/' + file_name)
+        for mode in (1, 2, 3):
+            pf = PathFinder(board, mode)
+            num_paths = pf.find_num_paths()
+            assert pf.get_stats()['shape'] == shape
+            search_pf = PathFinder(board, mode, use_closed_form=False)
+            assert num_paths == search_pf.find_num_paths()
+            assert search_pf.get_stats()['engine'] == SEARCH
+
+    # A chain of two stars joined by a village.
+    chain_str = [
+        '0@start@SP', '1@A@C', '2@B@V', '3@C@V', '4@D@V', '5@E@C',
+        '6@F@V', '7@end@FP',
+        '==============',
+        '0: 1', '1: 2, 3, 4', '4: 5', '5: 6', '5: 7'
+    ]
+    board = parse_board(chain_str)
+    for mode in (1, 2, 3):
+        pf = PathFinder(board, mode)
+        num_paths = pf.find_num_paths()
+        assert pf.get_stats() == {'engine': CLOSED_FORM,
+                                  'shape': CHAIN_OF_STARS, 'nodes': 0}
+        search_pf = PathFinder(board, mode, use_closed_form=False)
+        assert num_paths == search_pf.find_num_paths()
+
+def test_traversal_rules() -> None:
+    """Tests that custom traversal rules are followed, and that the preset
+    modes behave like the equivalent rules."""
+    board = get_board(TEST_PATH + 'tests/demo_input.txt')
+    for mode in (1, 2, 3):
+        assert PathFinder(board, MODE_RULES[mode]).find_num_paths() == \
+               PathFinder(board, mode).find_num_paths()
+
+    # Only villages remain, so there are four ways through.
+    no_cities = TraversalRules({VILLAGE: 1}, forbidden_types=(CITY,))
+    assert PathFinder(board, no_cities).find_num_paths() == 4
+
+    # A passport for every village is the same as visiting each village
+    # twice.
+    passports = TraversalRules({VILLAGE: 1, CITY: None}, num_passports=8,
+                               passport_types=(VILLAGE,))
+    twice = TraversalRules({VILLAGE: 2, CITY: None})
+    assert PathFinder(board, passports).find_num_paths() == \
+           PathFinder(board, twice).find_num_paths() == 4736
+
+    # Rules that would allow infinitely many paths or make no sense.
+    with pytest.raises(ValueError):
+        TraversalRules({VILLAGE: 1, CITY: None}, num_passports=-1)
+    with pytest.raises(ValueError):
+        TraversalRules({VILLAGE: -1, CITY: None})
+    with pytest.raises(ValueError):
+        PathFinder(simple_board, TraversalRules({VILLAGE: 1}))
+    with pytest.raises(ValueError):
+        PathFinder(max_board_5, TraversalRules({VILLAGE: None, CITY: 1}))
+
+
+def test_length_histogram() -> None:
+    """Tests that the number of paths of each length matches the lengths of
+    the recorded paths."""
+    for file_name in ('demo_input.txt', '1_c-5_v.txt'):
+        board = get_board(TEST_PATH + 'tests/test_boards/' + file_name)
+        for mode in (1, 2, 3):
+            histogram = PathFinder(board, mode).find_length_histogram()
+            _, paths = PathFinder(board, mode).get_paths()
+            expected = {}
+            for path in paths:
+                expected[len(path) - 1] = expected.get(len(path) - 1, 0) + 1
+            assert histogram == expected
+
+    histogram = PathFinder(simple_board, 1).find_length_histogram()
+    assert summarise_lengths(histogram) == (2, 4, 3.0)
+    assert summarise_lengths({}) is None
+
+def test_prune_unreachable() -> None:
+    """Tests that skipping settlements cut off from the finish port doesn't
+    change the paths found, and that a dead end is skipped."""
+    # A dead end of villages hanging off the route through a single city.
+    dead_end_str = [
+        '0@start@SP', '1@A@V', '2@B@C', '3@C@V', '4@D@V', '5@E@V',
+        '6@end@FP',
+        '==============',
+        '0: 1', '1: 2', '2: 3, 6', '3: 4, 5', '4: 5'
+    ]
+    dead_end = parse_board(dead_end_str)
+
+    for board in (simple_board, x_board, max_board_5, dead_end,
+                  get_board(TEST_PATH + 'tests/demo_input.txt')):
+        for mode in (1, 2, 3):
+            pf = PathFinder(board, mode, prune_unreachable=True)
+            unpruned_pf = PathFinder(board, mode)
+            paths = {tuple(sett.name for sett in path)
+                     for path in pf.get_paths()[1]}
+            unpruned_paths = {tuple(sett.name for sett in path)
+                              for path in unpruned_pf.get_paths()[1]}
+            assert paths == unpruned_paths
+
+    # Once the city is left behind, the dead end is never entered.
+    pf = PathFinder(dead_end, 1, prune_unreachable=True)
+    assert pf.find_num_paths() == 1
+    assert pf.get_stats()['nodes'] == 4
+
+    # Leaving the start port through A leaves B with no way to the finish
+    # port, even though A doesn't split the board on its own.
+    fork = parse_board([
+        '0@start@SP', '1@A@V', '2@end@FP', '3@B@V',
+        '==============',
+        '2: 1, 0', '3: 1, 0', '1: 0'
+    ])
+    pf = PathFinder(fork, 1, use_symmetry=False, prune_unreachable=True)
+    assert pf.find_num_paths() == 3
+    assert pf.get_stats()['nodes'] == 7
+
+
+def test_meet_in_the_middle() -> None:
+    """Tests that counting paths by meeting in the middle matches a depth
+    first search."""
+    rules = [1, 2, 3,
+             TraversalRules({VILLAGE: 2, CITY: None}, num_passports=2,
+                            passport_types=(VILLAGE, CITY)),
+             TraversalRules({VILLAGE: 1}, forbidden_types=(CITY,),
+                            num_passports=1, passport_types=(VILLAGE,)),
+             TraversalRules({VILLAGE: 0, CITY: None}, num_passports=2,
+                            passport_types=(VILLAGE,))]
+    isolated_complexity = get_board(
+        TEST_PATH + 'tests/test_boards/isolated_complexity.txt')
+    for board in (simple_board, x_board, max_board_5, isolated_complexity,
+                  get_board(TEST_PATH + 'tests/demo_input.txt')):
+        for mode in rules:
+            pf = PathFinder(board, mode, use_closed_form=False)
+            mitm_pf = PathFinder(board, mode, use_closed_form=False,
+                                 meet_in_the_middle=True)
+            assert mitm_pf.find_num_paths() == pf.find_num_paths()
+
+    # Villages that can only be entered with a passport, all connected.
+    passports_only = parse_board([
+        '0@start@SP', '1@A@V', '2@B@V', '3@end@FP',
+        '==============',
+        '0: 1, 2, 3', '1: 2, 3', '2: 3'
+    ])
+    pf = PathFinder(passports_only, rules[-1])
+    assert pf.find_num_paths() == 5
+    pf = PathFinder(passports_only, rules[-1], meet_in_the_middle=True)
+    assert pf.find_num_paths() == 5
+
+    pf = PathFinder(simple_board, 3, meet_in_the_middle=True)
+    pf.find_num_paths()
+    assert pf.get_stats()['engine'] == MEET_IN_THE_MIDDLE
+
+
+def test_path_participation() -> None:
+    """Tests that the number of paths through each settlement matches the
+    paths found."""
+    for board in (simple_board, x_board, max_board_5,
+                  get_board(TEST_PATH + 'tests/demo_input.txt')):
+        expected = [[] for _ in board.settlements]
+        for mode in (1, 2, 3):
+            paths = PathFinder(board, mode).get_paths()[1]
+            for i, sett in enumerate(board.settlements):
+                expected[i].append(sum(sett in path for path in paths))
+
+            for use_symmetry in (True, False):
+                pf = PathFinder(board, mode, use_symmetry=use_symmetry)
+                num_paths, usage = pf.find_settlement_usage()
+                assert num_paths == len(paths)
+                assert usage == [counts[-1] for counts in expected]
+
+        participation = find_path_participation(board)
+        assert [sett for sett, _ in participation] == board.settlements
+        assert [list(counts) for _, counts in participation] == \
+            expected